@@ -1,5 +1,22 @@
+import asyncio
 import anthropic
-from typing import List, Optional, Dict, Any
+import httpx
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
+
+# Shared connection pool so every AIGenerator reuses warm keep-alive connections;
+# HTTP/2 multiplexes concurrent requests over one connection instead of opening more.
+# It lives as long as the process, so no single app or generator closes it
+_HTTP_CLIENT = anthropic.DefaultAsyncHttpxClient(
+    http2=True,
+    limits=httpx.Limits(
+        max_keepalive_connections=20, max_connections=40, keepalive_expiry=60.0
+    ),
+    timeout=httpx.Timeout(60.0, connect=5.0),
+)
+
+
+# Beta that shrinks tool_use output tokens (built in from Claude 4 onwards)
+TOKEN_EFFICIENT_TOOLS_BETA = "token-efficient-tools-2025-02-19"
 
 
 class AIGenerator:
@@ -38,8 +55,18 @@ All responses must be:
 Provide only the direct answer to what was asked.
 """
 
-    def __init__(self, api_key: str, model: str):
-        self.client = anthropic.Anthropic(api_key=api_key)
+    # Immutable system content shared by every request; the cache_control
+    # breakpoint works because it is byte-identical across turns
+    SYSTEM_BLOCKS = [
+        {
+            "type": "text",
+            "text": SYSTEM_PROMPT,
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+
+    def __init__(self, api_key: str, model: str, token_efficient_tools: bool = False):
+        self.client = anthropic.AsyncAnthropic(api_key=api_key, http_client=_HTTP_CLIENT)
         self.model = model
 
         # Pre-build base API parameters
@@ -48,9 +75,20 @@ Provide only the direct answer to what was asked.
             "temperature": 0,
             "max_tokens": 800
         }
+
+        # Extra request options for tool-enabled calls only
+        self.tool_request_options = (
+            {"extra_headers": {"anthropic-beta": TOKEN_EFFICIENT_TOOLS_BETA}}
+            if token_efficient_tools
+            else {}
+        )
+
+        # Cache-marked copy of the last tool list seen, reused while it is unchanged
+        self._tools_source: Optional[List] = None
+        self._prepared_tools: List[Dict[str, Any]] = []
     
-    def generate_response(self, query: str,
-                         conversation_history: Optional[str] = None,
+    async def generate_response(self, query: str,
+                         conversation_history: Optional[List[Dict[str, str]]] = None,
                          tools: Optional[List] = None,
                          tool_manager=None,
                          max_rounds: int = 2) -> str:
@@ -59,7 +97,7 @@ Provide only the direct answer to what was asked.
 
         Args:
             query: The user's question or request
-            conversation_history: Previous messages for context
+            conversation_history: Previous role-tagged messages for context
             tools: Available tools the AI can use
             tool_manager: Manager to execute tools
             max_rounds: Maximum number of sequential tool calling rounds (default: 2)
@@ -67,20 +105,11 @@ Provide only the direct answer to what was asked.
         Returns:
             Generated response as string
         """
-
-        # Build system content efficiently - avoid string ops when possible
-        system_content = (
-            f"{self.SYSTEM_PROMPT}\n\nPrevious conversation:\n{conversation_history}"
-            if conversation_history
-            else self.SYSTEM_PROMPT
-        )
-        
-        # Initialize messages for conversation
-        messages = [{"role": "user", "content": query}]
+        system_content, messages = self._build_request(query, conversation_history)
         
         # Use sequential rounds if tools are available
         if tools and tool_manager:
-            return self._execute_sequential_rounds(messages, system_content, tools, tool_manager, max_rounds)
+            return await self._execute_sequential_rounds(messages, system_content, tools, tool_manager, max_rounds)
         
         # Fallback to simple single call without tools
         api_params = {
@@ -89,17 +118,67 @@ Provide only the direct answer to what was asked.
             "system": system_content
         }
         
-        response = self.client.messages.create(**api_params)
+        response = await self.client.messages.create(**api_params)
         return response.content[0].text
     
-    def _execute_sequential_rounds(self, messages: List[Dict], system_content: str, 
+    async def generate_response_stream(self, query: str,
+                                       conversation_history: Optional[List[Dict[str, str]]] = None,
+                                       tools: Optional[List] = None,
+                                       tool_manager=None,
+                                       max_rounds: int = 2) -> AsyncIterator[str]:
+        """
+        Generate AI response like generate_response, yielding text as it arrives.
+
+        Tool rounds run to completion first because their tool_use blocks must
+        be parsed; only the final answer after the last tool call is streamed.
+
+        Args:
+            query: The user's question or request
+            conversation_history: Previous role-tagged messages for context
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+            max_rounds: Maximum number of sequential tool calling rounds (default: 2)
+
+        Yields:
+            Chunks of response text
+
+        Raises:
+            RuntimeError: If a Claude API call fails, possibly after some
+                chunks were already yielded
+        """
+        system_content, messages = self._build_request(query, conversation_history)
+        stream_params = {**self.base_params, "system": system_content}
+        
+        if tools and tool_manager:
+            tool_params = self._tool_params(system_content, tools)
+            answer = await self._run_tool_rounds(messages, tool_params, tool_manager, max_rounds)
+            if answer is not None:
+                if self.is_error_response(answer):
+                    raise RuntimeError(answer)
+                yield answer
+                return
+            stream_params = self._final_params(tool_params)
+        
+        try:
+            async with self.client.messages.stream(**stream_params, messages=messages) as stream:
+                async for text in stream.text_stream:
+                    yield text
+        except Exception as e:
+            raise RuntimeError(f"Error generating response: {str(e)}") from e
+    
+    @staticmethod
+    def is_error_response(text: str) -> bool:
+        """Check whether generated text is an API error message rather than an answer"""
+        return text.startswith("Error generating ")
+    
+    async def _execute_sequential_rounds(self, messages: List[Dict], system_content: List[Dict],
                                   tools: List, tool_manager, max_rounds: int) -> str:
         """
         Execute up to max_rounds of tool-enabled conversations.
         
         Args:
             messages: Initial message list
-            system_content: System prompt content
+            system_content: System prompt content blocks
             tools: Available tools for Claude
             tool_manager: Manager to execute tools
             max_rounds: Maximum number of rounds
@@ -107,20 +186,47 @@ Provide only the direct answer to what was asked.
         Returns:
             Final response text
         """
+        tool_params = self._tool_params(system_content, tools)
+        answer = await self._run_tool_rounds(messages, tool_params, tool_manager, max_rounds)
+        if answer is not None:
+            return answer
+        
+        # Max rounds reached or a tool failed - final call with tool use disabled ensures a response
+        try:
+            final_response = await self.client.messages.create(
+                **self._final_params(tool_params), messages=messages
+            )
+            return final_response.content[0].text
+        except Exception as e:
+            return f"Error generating final response: {str(e)}"
+    
+    async def _run_tool_rounds(self, messages: List[Dict], tool_params: Dict[str, Any],
+                               tool_manager, max_rounds: int) -> Optional[str]:
+        """
+        Run up to max_rounds of tool-enabled calls, extending messages in place.
+        
+        Args:
+            messages: Message list to extend with tool calls and results
+            tool_params: Parameters for tool-enabled calls, from _tool_params
+            tool_manager: Manager to execute tools
+            max_rounds: Maximum number of rounds, at least 1
+            
+        Returns:
+            Claude's answer (or an error message) if the rounds produced one,
+            None if a final call with tool use disabled is still needed
+            
+        Raises:
+            ValueError: If max_rounds is less than 1
+        """
+        if max_rounds < 1:
+            raise ValueError(f"max_rounds must be at least 1, got {max_rounds}")
+        
         round_count = 0
         
         while round_count < max_rounds:
             # Make API call with tools available
             try:
-                api_params = {
-                    **self.base_params,
-                    "messages": messages,
-                    "system": system_content,
-                    "tools": tools,
-                    "tool_choice": {"type": "auto"}
-                }
-                
-                response = self.client.messages.create(**api_params)
+                response = await self.client.messages.create(**tool_params, messages=messages)
                 round_count += 1
                 
                 # Check if Claude chose to use tools
@@ -129,126 +235,183 @@ Provide only the direct answer to what was asked.
                     return response.content[0].text
                 
                 # Execute tools and update messages
-                messages, tool_success = self._handle_tool_execution_sequential(response, messages, tool_manager)
+                messages, tool_success = await self._handle_tool_execution(response, messages, tool_manager)
                 
                 if not tool_success:
-                    # Tool execution failed - make final call to let Claude respond to error
-                    final_params = {
-                        **self.base_params,
-                        "messages": messages,
-                        "system": system_content
-                    }
-                    final_response = self.client.messages.create(**final_params)
-                    return final_response.content[0].text
+                    # Tool execution failed - final call lets Claude respond to error
+                    return None
                 
             except Exception as e:
                 # API call failed - return error message
                 return f"Error generating response: {str(e)}"
         
-        # Max rounds reached - make final call without tools to ensure response
-        try:
-            final_params = {
-                **self.base_params,
-                "messages": messages,
-                "system": system_content
-            }
-            final_response = self.client.messages.create(**final_params)
-            return final_response.content[0].text
-        except Exception as e:
-            return f"Error generating final response: {str(e)}"
+        return None
     
-    def _handle_tool_execution_sequential(self, response, messages: List[Dict], tool_manager):
+    def _tool_params(self, system_content: List[Dict], tools: List) -> Dict[str, Any]:
         """
-        Execute tools and update message chain for sequential rounds.
+        Build the parameters shared by every tool-enabled call for a query.
+
+        Only messages change between rounds, so this is built once per query.
+
+        Args:
+            system_content: System prompt content blocks
+            tools: Available tools for Claude
+
+        Returns:
+            Keyword arguments for messages.create, without messages
+        """
+        return {
+            **self.base_params,
+            "system": system_content,
+            "tools": self._prepare_tools(tools),
+            "tool_choice": {"type": "auto"},
+            **self.tool_request_options
+        }
+
+    @staticmethod
+    def _final_params(tool_params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Derive parameters for the answer after the last tool round.
+
+        The tools stay in the request because the API requires them once
+        messages hold tool_use blocks, and keeping them preserves the cached
+        prefix; tool_choice "none" makes Claude answer instead of calling.
+
+        Args:
+            tool_params: Parameters for tool-enabled calls, from _tool_params
+
+        Returns:
+            Keyword arguments for messages.create or messages.stream
+        """
+        return {**tool_params, "tool_choice": {"type": "none"}}
+
+    def _build_request(self, query: str,
+                       conversation_history: Optional[List[Dict[str, str]]]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Build the system content blocks and messages for a query.
         
         Args:
-            response: Claude's response containing tool use blocks
-            messages: Current message list to update
-            tool_manager: Manager to execute tools
+            query: The user's question or request
+            conversation_history: Previous role-tagged messages for context
             
         Returns:
-            Tuple of (updated_messages, success_flag)
+            Tuple of (system_content, messages)
         """
-        # Add Claude's tool use response to messages
-        messages.append({"role": "assistant", "content": response.content})
-        
-        # Execute all tool calls and collect results
-        tool_results = []
-        execution_success = True
-        
-        for content_block in response.content:
-            if content_block.type == "tool_use":
-                try:
-                    tool_result = tool_manager.execute_tool(
-                        content_block.name, 
-                        **content_block.input
-                    )
-                    
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": content_block.id,
-                        "content": tool_result
-                    })
-                except Exception as e:
-                    # Tool execution failed - add error to results
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": content_block.id,
-                        "content": f"Tool execution failed: {str(e)}"
-                    })
-                    execution_success = False
-        
-        # Add tool results to messages
-        if tool_results:
-            messages.append({"role": "user", "content": tool_results})
-        
-        return messages, execution_success
+        # Prior turns go ahead of the query so history extends the cached prefix
+        messages = self._history_to_messages(conversation_history)
+        messages.append({"role": "user", "content": query})
+        return self.SYSTEM_BLOCKS, messages
     
-    def _handle_tool_execution(self, initial_response, base_params: Dict[str, Any], tool_manager):
+    @staticmethod
+    def _history_to_messages(conversation_history: Optional[List[Dict[str, str]]]) -> List[Dict]:
         """
-        Handle execution of tool calls and get follow-up response.
+        Convert conversation history into API messages ending in a cache breakpoint.
+
+        The breakpoint on the latest prior turn advances with the conversation,
+        so each turn reuses the prefix cached by the one before it.
 
         Args:
-            initial_response: The response containing tool use requests
-            base_params: Base API parameters
-            tool_manager: Manager to execute tools
+            conversation_history: Previous role-tagged messages, oldest first
 
         Returns:
-            Final response text after tool execution
+            New list of messages safe to extend with the current query
         """
-        # Start with existing messages
-        messages = base_params["messages"].copy()
-
-        # Add AI's tool use response
-        messages.append({"role": "assistant", "content": initial_response.content})
+        if not conversation_history:
+            return []
 
-        # Execute all tool calls and collect results
-        tool_results = []
-        for content_block in initial_response.content:
-            if content_block.type == "tool_use":
-                tool_result = tool_manager.execute_tool(
-                    content_block.name, **content_block.input
-                )
-
-                tool_results.append(
+        *earlier, latest = conversation_history
+        return [
+            *({"role": msg["role"], "content": msg["content"]} for msg in earlier),
+            {
+                "role": latest["role"],
+                "content": [
                     {
-                        "type": "tool_result",
-                        "tool_use_id": content_block.id,
-                        "content": tool_result,
+                        "type": "text",
+                        "text": latest["content"],
+                        "cache_control": {"type": "ephemeral"},
                     }
-                )
+                ],
+            },
+        ]
 
-        # Add tool results as single message
-        if tool_results:
-            messages.append({"role": "user", "content": tool_results})
+    def _prepare_tools(self, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Return the cache-marked tool list, rebuilding it only when tools change.
 
-        # Prepare final API call without tools
-        final_params = {
-            **self.base_params,
-            "messages": messages,
-            "system": base_params["system"],
-        }
+        Args:
+            tools: Tool definitions to send to Claude
+
+        Returns:
+            Tool definitions with a cache breakpoint on the last tool
+        """
+        if tools is not self._tools_source:
+            self._prepared_tools = self._with_cache_breakpoint(tools)
+            self._tools_source = tools
+        return self._prepared_tools
+
+    @staticmethod
+    def _with_cache_breakpoint(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Mark the end of the tool definitions as a prompt cache breakpoint.
+
+        The last tool is cloned rather than mutated so the caller's
+        definitions are left untouched.
+
+        Args:
+            tools: Tool definitions to send to Claude
+
+        Returns:
+            Tool definitions with cache_control set on the last tool
+        """
+        if not tools:
+            return tools
+        return [*tools[:-1], {**tools[-1], "cache_control": {"type": "ephemeral"}}]
 
-        # Get final response
-        final_response = self.client.messages.create(**final_params)
-        return final_response.content[0].text
+    async def _handle_tool_execution(self, response, messages: List[Dict], tool_manager):
+        """
+        Execute tools and update message chain for sequential rounds.
+        
+        Args:
+            response: Claude's response containing tool use blocks
+            messages: Current message list to update
+            tool_manager: Manager to execute tools
+            
+        Returns:
+            Tuple of (updated_messages, success_flag)
+        """
+        # Add Claude's tool use response to messages
+        messages.append({"role": "assistant", "content": response.content})
+        
+        tool_blocks = [block for block in response.content if block.type == "tool_use"]
+        if not tool_blocks:
+            return messages, True
+        
+        # Tools are blocking and I/O-bound, so run them concurrently off the event loop
+        outcomes = await asyncio.gather(
+            *(
+                asyncio.to_thread(tool_manager.execute_tool, block.name, **block.input)
+                for block in tool_blocks
+            ),
+            return_exceptions=True,
+        )
+        
+        # Build results in one pass, in block order to keep the message pair
+        # well-formed; failed tools report their error for Claude to respond to
+        messages.append({
+            "role": "user",
+            "content": [
+                {
+                    "type": "tool_result",
+                    "tool_use_id": content_block.id,
+                    "content": (
+                        f"Tool execution failed: {str(outcome)}"
+                        if isinstance(outcome, Exception)
+                        else outcome
+                    )
+                }
+                for content_block, outcome in zip(tool_blocks, outcomes)
+            ]
+        })
+        
+        execution_success = not any(isinstance(outcome, Exception) for outcome in outcomes)
+        return messages, execution_success
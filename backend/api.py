@@ -0,0 +1,138 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from rag_system import RAGSystem
+
+
+def get_rag_system(request: Request) -> RAGSystem:
+    """Provide the app's RAG system to endpoints (overridable in tests)"""
+    return request.app.state.rag_system
+
+
+def _server_sent_event(event: Dict[str, Any]) -> bytes:
+    """Encode one event as a server-sent event data frame"""
+    return b"data: " + orjson.dumps(event) + b"\n\n"
+
+
+async def stream_query_events(
+    rag: RAGSystem, query: str, session_id: str
+) -> AsyncIterator[bytes]:
+    """
+    Format streamed query events as server-sent events.
+
+    The response has already started by the time a failure surfaces here,
+    so it is reported as a final {"type": "error"} event instead of a 500.
+    """
+    try:
+        async for event in rag.query_stream(query, session_id):
+            if event["type"] == "done":
+                event = {**event, "session_id": session_id}
+            yield _server_sent_event(event)
+    except Exception as e:
+        yield _server_sent_event({"type": "error", "detail": str(e)})
+
+
+# Pydantic models for request/response
+class QueryRequest(BaseModel):
+    """Request model for course queries"""
+
+    query: str
+    session_id: Optional[str] = None
+
+
+class QueryResponse(BaseModel):
+    """Response model for course queries"""
+
+    answer: str
+    sources: List[Dict[str, Optional[str]]]
+    session_id: str
+
+
+class CourseStats(BaseModel):
+    """Response model for course statistics"""
+
+    total_courses: int
+    course_titles: List[str]
+
+class ClearSessionRequest(BaseModel):
+    """Request model for clearing a session"""
+    session_id: str
+
+class ClearSessionResponse(BaseModel):
+    """Response model for clearing a session"""
+    success: bool
+    message: str
+
+# API Endpoints, included by app.py
+router = APIRouter()
+
+# Handlers build their payloads themselves, so they return plain dicts with
+# response_model=None to skip outbound validation; the models stay in the
+# OpenAPI docs through `responses`
+
+
+@router.post(
+    "/api/query", response_model=None, responses={200: {"model": QueryResponse}}
+)
+async def query_documents(
+    request: QueryRequest,
+    accept: Optional[str] = Header(None),
+    rag: RAGSystem = Depends(get_rag_system),
+):
+    """Process a query and return response with sources"""
+    try:
+        # Create session if not provided
+        session_id = request.session_id
+        if not session_id:
+            session_id = rag.session_manager.create_session()
+
+        # Stream the answer as server-sent events when the client asks for it
+        if accept and "text/event-stream" in accept:
+            return StreamingResponse(
+                stream_query_events(rag, request.query, session_id),
+                media_type="text/event-stream",
+            )
+
+        # Process query using RAG system
+        answer, sources = await rag.query(request.query, session_id)
+
+        return {"answer": answer, "sources": sources, "session_id": session_id}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get(
+    "/api/courses", response_model=None, responses={200: {"model": CourseStats}}
+)
+async def get_course_stats(rag: RAGSystem = Depends(get_rag_system)):
+    """Get course analytics and statistics"""
+    try:
+        analytics = rag.get_course_analytics()
+        return {
+            "total_courses": analytics["total_courses"],
+            "course_titles": analytics["course_titles"],
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post(
+    "/api/clear_session",
+    response_model=None,
+    responses={200: {"model": ClearSessionResponse}},
+)
+async def clear_session(
+    request: ClearSessionRequest, rag: RAGSystem = Depends(get_rag_system)
+):
+    """Clear a conversation session"""
+    try:
+        rag.session_manager.clear_session(request.session_id)
+        return {
+            "success": True,
+            "message": f"Session {request.session_id} cleared successfully",
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
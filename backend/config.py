@@ -13,6 +13,9 @@ class Config:
     # Anthropic API settings
     ANTHROPIC_API_KEY: str = os.getenv("ANTHROPIC_API_KEY", "")
     ANTHROPIC_MODEL: str = "claude-sonnet-4-20250514"
+    # Token-efficient tool use beta header; only Claude 3.7 Sonnet needs it,
+    # Claude 4 models already encode tool calls efficiently
+    TOKEN_EFFICIENT_TOOLS: bool = False
 
     # Embedding model settings
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
@@ -23,6 +26,15 @@ class Config:
     MAX_RESULTS: int = 5  # Maximum search results to return
     MAX_HISTORY: int = 2  # Number of conversation messages to remember
 
+    # Response cache settings
+    RESPONSE_CACHE_SIZE: int = 1024  # Maximum cached responses
+    RESPONSE_CACHE_TTL: float = 300.0  # Seconds before a cached response expires
+    # Semantic matching reuses answers for reworded questions. Off by default:
+    # questions differing only in a lesson number or course name can score
+    # above the threshold and would get each other's answers
+    SEMANTIC_CACHE: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.97  # Cosine similarity for a semantic hit
+
     # Database paths
     CHROMA_PATH: str = "./chroma_db"  # ChromaDB storage location
 
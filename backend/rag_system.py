@@ -1,13 +1,29 @@
-from typing import List, Tuple, Optional, Dict
+from typing import Any, AsyncIterator, Callable, List, Tuple, Optional, Dict
+from dataclasses import dataclass
+import asyncio
 import os
 from document_processor import DocumentProcessor
 from vector_store import VectorStore
 from ai_generator import AIGenerator
 from session_manager import SessionManager
+from response_cache import ResponseCache
 from search_tools import ToolManager, CourseSearchTool, CourseOutlineTool
 from models import Course, Lesson, CourseChunk
 
 
+@dataclass
+class _PreparedQuery:
+    """A query with its prompt, history and response cache identity"""
+
+    query: str
+    session_id: Optional[str]
+    prompt: str
+    history: Optional[List[Dict[str, str]]]
+    cache_key: bytes
+    cache_context: bytes
+    embedding: Optional[Any] = None  # Set by the semantic cache lookup
+
+
 class RAGSystem:
     """Main orchestrator for the Retrieval-Augmented Generation system"""
 
@@ -22,9 +38,21 @@ class RAGSystem:
             config.CHROMA_PATH, config.EMBEDDING_MODEL, config.MAX_RESULTS
         )
         self.ai_generator = AIGenerator(
-            config.ANTHROPIC_API_KEY, config.ANTHROPIC_MODEL
+            config.ANTHROPIC_API_KEY,
+            config.ANTHROPIC_MODEL,
+            config.TOKEN_EFFICIENT_TOOLS,
         )
         self.session_manager = SessionManager(config.MAX_HISTORY)
+        self.response_cache = ResponseCache(
+            maxsize=config.RESPONSE_CACHE_SIZE,
+            ttl=config.RESPONSE_CACHE_TTL,
+            embedding_function=(
+                self.vector_store.embedding_function if config.SEMANTIC_CACHE else None
+            ),
+            similarity_threshold=config.SEMANTIC_CACHE_THRESHOLD,
+        )
+        # Generations still running, by response cache key
+        self._in_flight: Dict[bytes, asyncio.Task] = {}
 
         # Initialize search tools
         self.tool_manager = ToolManager()
@@ -55,6 +83,9 @@ class RAGSystem:
             # Add course content chunks to vector store
             self.vector_store.add_course_content(course_chunks)
 
+            # Cached answers may predate the new content
+            self.response_cache.clear()
+
             return course, len(course_chunks)
         except Exception as e:
             print(f"Error processing course document {file_path}: {e}")
@@ -116,9 +147,13 @@ class RAGSystem:
                 except Exception as e:
                     print(f"Error processing {file_name}: {e}")
 
+        # Cached answers may predate the new or cleared content
+        if total_courses or clear_existing:
+            self.response_cache.clear()
+
         return total_courses, total_chunks
 
-    def query(
+    async def query(
         self, query: str, session_id: Optional[str] = None
     ) -> Tuple[str, List[str]]:
         """
@@ -131,35 +166,192 @@ class RAGSystem:
         Returns:
             Tuple of (response, sources list - empty for tool-based approach)
         """
+        prepared = self._prepare_query(query, session_id)
+
+        # Reuse a cached answer for the same (or a near-identical) question
+        cached = await self._lookup_cache(prepared)
+
+        if cached is not None:
+            response, sources = cached
+        else:
+            response, sources = await self._generate_shared(prepared)
+
+        self._record_exchange(prepared, response)
+
+        # Return response with sources from tool searches
+        return response, sources
+
+    async def query_stream(
+        self, query: str, session_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a user query like query(), streaming the answer as it is generated.
+
+        Cached answers and answers shared with an identical in-flight query
+        arrive as a single delta.
+
+        Args:
+            query: User's question
+            session_id: Optional session ID for conversation context
+
+        Yields:
+            {"type": "delta", "text": ...} events with answer text, followed by
+            one {"type": "done", "sources": [...]} event
+
+        Raises:
+            RuntimeError: If generating the answer fails, possibly after some
+                deltas were already yielded
+        """
+        prepared = self._prepare_query(query, session_id)
+        cached = await self._lookup_cache(prepared)
+
+        if cached is not None:
+            response, sources = cached
+            yield {"type": "delta", "text": response}
+        elif prepared.cache_key in self._in_flight:
+            response, sources = await self._generate_shared(prepared)
+            # A shared non-streaming generation reports failures as text
+            if self.ai_generator.is_error_response(response):
+                raise RuntimeError(response)
+            yield {"type": "delta", "text": response}
+        else:
+            # The generation runs as a shared task like query()'s and hands
+            # chunks over a queue, ending with None once the task is done
+            chunks: asyncio.Queue = asyncio.Queue()
+            generation = self._start_generation(prepared, on_chunk=chunks.put_nowait)
+            generation.add_done_callback(lambda _: chunks.put_nowait(None))
+            while (chunk := await chunks.get()) is not None:
+                yield {"type": "delta", "text": chunk}
+            response, sources = await generation
+
+        self._record_exchange(prepared, response)
+
+        yield {"type": "done", "sources": sources}
+
+    def _prepare_query(self, query: str, session_id: Optional[str]) -> _PreparedQuery:
+        """Build the prompt, history and cache identity shared by both query paths"""
         # Create prompt for the AI with clear instructions
         prompt = f"""Answer this question about course materials: {query}"""
 
         # Get conversation history if session exists
         history = None
         if session_id:
-            history = self.session_manager.get_conversation_history(session_id)
-
-        # Generate response using AI with tools
-        response = self.ai_generator.generate_response(
-            query=prompt,
-            conversation_history=history,
-            tools=self.tool_manager.get_tool_definitions(),
-            tool_manager=self.tool_manager,
+            history = self.session_manager.get_history_messages(session_id)
+
+        cache_context = ResponseCache.make_context(
+            self.tool_manager.get_tool_signature(), history
+        )
+        return _PreparedQuery(
+            query=query,
+            session_id=session_id,
+            prompt=prompt,
+            history=history,
+            cache_key=ResponseCache.make_key(query, cache_context),
+            cache_context=cache_context,
         )
 
-        # Get sources from the search tool
-        sources = self.tool_manager.get_last_sources()
+    async def _lookup_cache(self, prepared: _PreparedQuery) -> Optional[Tuple[str, List]]:
+        """
+        Look up a cached response, trying an exact match before a semantic one.
 
-        # Reset sources after retrieving them
-        self.tool_manager.reset_sources()
+        The query embedding computed for the semantic lookup is kept on
+        prepared so a miss can be stored with it.
 
-        # Update conversation history
-        if session_id:
-            self.session_manager.add_exchange(session_id, query, response)
+        Returns:
+            Cached (response, sources), or None on a miss
+        """
+        cached = self.response_cache.get(prepared.cache_key)
+        if cached is None:
+            prepared.embedding = await asyncio.to_thread(
+                self.response_cache.embed, prepared.query
+            )
+            cached = self.response_cache.get_similar(
+                prepared.embedding, prepared.cache_context
+            )
+        return cached
 
-        # Return response with sources from tool searches
+    async def _generate_shared(self, prepared: _PreparedQuery) -> Tuple[str, List]:
+        """
+        Generate a response, sharing one generation between identical queries.
+
+        Concurrent requests with the same cache key all miss the cache, so
+        later ones wait on the first one's generation instead of each
+        calling Claude. The generation is shielded so one caller
+        disconnecting does not cancel it for the others.
+
+        Returns:
+            Tuple of (response, sources)
+        """
+        task = self._in_flight.get(prepared.cache_key)
+        if task is None:
+            task = self._start_generation(prepared)
+        return await asyncio.shield(task)
+
+    def _start_generation(
+        self,
+        prepared: _PreparedQuery,
+        on_chunk: Optional[Callable[[str], None]] = None,
+    ) -> asyncio.Task:
+        """Start a generation task that identical queries can join until it ends"""
+        task = asyncio.ensure_future(self._generate(prepared, on_chunk))
+        self._in_flight[prepared.cache_key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(prepared.cache_key, None))
+        return task
+
+    async def _generate(
+        self,
+        prepared: _PreparedQuery,
+        on_chunk: Optional[Callable[[str], None]] = None,
+    ) -> Tuple[str, List]:
+        """
+        Generate a response with tools and cache it unless it is an error.
+
+        Args:
+            prepared: Query to answer
+            on_chunk: Called with each chunk of text to stream the answer;
+                without it the answer is generated in one call
+
+        Returns:
+            Tuple of (response, sources)
+        """
+        params = {
+            "query": prepared.prompt,
+            "conversation_history": prepared.history,
+            "tools": self.tool_manager.get_tool_definitions(),
+            "tool_manager": self.tool_manager,
+        }
+
+        # Runs in its own task, so concurrent generations collect separately
+        with self.tool_manager.collect_sources() as sources:
+            if on_chunk is None:
+                chunks = [await self.ai_generator.generate_response(**params)]
+            else:
+                chunks = []
+                async for chunk in self.ai_generator.generate_response_stream(
+                    **params
+                ):
+                    chunks.append(chunk)
+                    on_chunk(chunk)
+
+        response = "".join(chunks)
+
+        if not self.ai_generator.is_error_response(response):
+            self.response_cache.put(
+                prepared.cache_key,
+                (response, sources),
+                prepared.cache_context,
+                prepared.embedding,
+            )
         return response, sources
 
+    def _record_exchange(self, prepared: _PreparedQuery, response: str):
+        """Add the answered query to its session's conversation history"""
+        # A failed generation is not an assistant turn worth remembering
+        if prepared.session_id and not self.ai_generator.is_error_response(response):
+            self.session_manager.add_exchange(
+                prepared.session_id, prepared.query, response
+            )
+
     def get_course_analytics(self) -> Dict:
         """Get analytics about the course catalog"""
         return {
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class ResponseCache:
+    """Two-level cache of query responses: exact-match LRU, then semantic match"""
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 300.0,
+        embedding_function: Optional[Callable[[List[str]], List[Any]]] = None,
+        similarity_threshold: float = 0.97,
+        semantic_window: int = 256,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.embedding_function = embedding_function
+        self.similarity_threshold = similarity_threshold
+        # key -> (expiry time, cached value), least recently used first
+        self._entries: OrderedDict[bytes, Tuple[float, Any]] = OrderedDict()
+        # (context, key, unit embedding) for the most recently stored queries
+        self._recent: Deque[Tuple[bytes, bytes, np.ndarray]] = deque(
+            maxlen=semantic_window
+        )
+
+    @staticmethod
+    def make_context(
+        tool_signature: bytes, history: Optional[List[Dict[str, str]]]
+    ) -> bytes:
+        """Digest everything besides the query that shapes a response"""
+        history_bytes = json.dumps(history or [], sort_keys=True).encode()
+        return hashlib.blake2b(tool_signature + history_bytes, digest_size=16).digest()
+
+    @staticmethod
+    def make_key(query: str, context: bytes) -> bytes:
+        """Build the exact-match key for a query in a given context"""
+        return hashlib.blake2b(query.encode() + context, digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[Any]:
+        """Get an unexpired value by exact key"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def embed(self, query: str) -> Optional[np.ndarray]:
+        """
+        Embed a query as a unit vector for semantic lookups.
+
+        This runs the embedding model, so async callers should run it in a
+        worker thread.
+
+        Returns:
+            Normalized embedding, or None when semantic matching is disabled
+        """
+        if self.embedding_function is None:
+            return None
+
+        vector = np.asarray(self.embedding_function([query])[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get_similar(
+        self, embedding: Optional[np.ndarray], context: bytes
+    ) -> Optional[Any]:
+        """Get the value of the most similar recent query in the same context"""
+        if embedding is None:
+            return None
+
+        # Skip queries whose entries were evicted or expired, so a stale best
+        # match cannot hide a live one
+        now = time.monotonic()
+        candidates = [
+            (key, vec)
+            for ctx, key, vec in self._recent
+            if ctx == context
+            and key in self._entries
+            and self._entries[key][0] >= now
+        ]
+        if not candidates:
+            return None
+
+        similarities = np.stack([vec for _, vec in candidates]) @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        return self.get(candidates[best][0])
+
+    def put(
+        self,
+        key: bytes,
+        value: Any,
+        context: bytes,
+        embedding: Optional[np.ndarray] = None,
+    ):
+        """Store a value, evicting the least recently used entry when full"""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+        if embedding is not None:
+            self._recent.append((context, key, embedding))
+
+    def clear(self):
+        """Drop all cached responses"""
+        self._entries.clear()
+        self._recent.clear()
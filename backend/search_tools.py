@@ -1,7 +1,23 @@
-from typing import Dict, Any, Optional, Protocol
+import hashlib
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Iterator, List, Optional, Protocol
 from abc import ABC, abstractmethod
 from vector_store import VectorStore, SearchResults
 
+# Sources found by searches for the current request, see ToolManager.collect_sources
+_request_sources: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar(
+    "request_sources", default=None
+)
+
+
+def record_sources(sources: List[Dict[str, Any]]):
+    """Add search sources to the current request's collection, if any"""
+    collected = _request_sources.get()
+    if collected is not None:
+        collected.extend(sources)
+
 
 class Tool(ABC):
     """Abstract base class for all tools"""
@@ -22,7 +38,6 @@ class CourseSearchTool(Tool):
 
     def __init__(self, vector_store: VectorStore):
         self.store = vector_store
-        self.last_sources = []  # Track sources from last search
 
     def get_tool_definition(self) -> Dict[str, Any]:
         """Return Anthropic tool definition for this tool"""
@@ -122,8 +137,8 @@ class CourseSearchTool(Tool):
 
             formatted.append(f"{header}\n{doc}")
 
-        # Store sources for retrieval
-        self.last_sources = sources
+        # Store sources for retrieval by the request that ran this search
+        record_sources(sources)
 
         return "\n\n".join(formatted)
 
@@ -209,6 +224,8 @@ class ToolManager:
 
     def __init__(self):
         self.tools = {}
+        self._tool_definitions = None  # Built lazily, reset on registration
+        self._tool_signature = None
 
     def register_tool(self, tool: Tool):
         """Register any tool that implements the Tool interface"""
@@ -217,10 +234,26 @@ class ToolManager:
         if not tool_name:
             raise ValueError("Tool must have a 'name' in its definition")
         self.tools[tool_name] = tool
+        self._tool_definitions = None
+        self._tool_signature = None
 
     def get_tool_definitions(self) -> list:
         """Get all tool definitions for Anthropic tool calling"""
-        return [tool.get_tool_definition() for tool in self.tools.values()]
+        # Same list object until a tool is registered, so callers can cache on it
+        if self._tool_definitions is None:
+            self._tool_definitions = [
+                tool.get_tool_definition() for tool in self.tools.values()
+            ]
+        return self._tool_definitions
+
+    def get_tool_signature(self) -> bytes:
+        """Get a digest of the tool definitions that changes on registration"""
+        if self._tool_signature is None:
+            definitions = json.dumps(self.get_tool_definitions(), sort_keys=True)
+            self._tool_signature = hashlib.blake2b(
+                definitions.encode(), digest_size=16
+            ).digest()
+        return self._tool_signature
 
     def execute_tool(self, tool_name: str, **kwargs) -> str:
         """Execute a tool by name with given parameters"""
@@ -229,16 +262,22 @@ class ToolManager:
 
         return self.tools[tool_name].execute(**kwargs)
 
-    def get_last_sources(self) -> list:
-        """Get sources from the last search operation"""
-        # Check all tools for last_sources attribute
-        for tool in self.tools.values():
-            if hasattr(tool, "last_sources") and tool.last_sources:
-                return tool.last_sources
-        return []
-
-    def reset_sources(self):
-        """Reset sources from all tools that track sources"""
-        for tool in self.tools.values():
-            if hasattr(tool, "last_sources"):
-                tool.last_sources = []
+    @contextmanager
+    def collect_sources(self) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Collect the sources of every search run in the current context.
+
+        Concurrent requests share this manager and its tools, so sources are
+        gathered per context instead of on the tools. Tool calls made through
+        asyncio.to_thread copy the context, so their searches land in the
+        list of the request that made them.
+
+        Yields:
+            List that is extended with sources as searches run
+        """
+        sources: List[Dict[str, Any]] = []
+        token = _request_sources.set(sources)
+        try:
+            yield sources
+        finally:
+            _request_sources.reset(token)
@@ -0,0 +1,15 @@
+from fastapi.responses import FileResponse
+from fastapi.staticfiles import StaticFiles
+
+
+class DevStaticFiles(StaticFiles):
+    """Static file handler with no-cache headers for development"""
+
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if isinstance(response, FileResponse):
+            # Add no-cache headers for development
+            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+            response.headers["Pragma"] = "no-cache"
+            response.headers["Expires"] = "0"
+        return response
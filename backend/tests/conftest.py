@@ -1,8 +1,8 @@
+import httpx
 import pytest
-import tempfile
-import shutil
+import pytest_asyncio
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 from fastapi.testclient import TestClient
 import os
 import sys
@@ -13,29 +13,28 @@ sys.path.insert(0, str(backend_dir))
 
 from config import Config
 from rag_system import RAGSystem
+from api import get_rag_system, router
 from models import Course, CourseChunk
 
 
 @pytest.fixture
-def temp_dir():
-    """Create a temporary directory for test files"""
-    temp_dir = tempfile.mkdtemp()
-    yield temp_dir
-    shutil.rmtree(temp_dir)
+def temp_dir(tmp_path):
+    """Create a temporary directory for test files (cleaned up by pytest)"""
+    return str(tmp_path)
 
 
-@pytest.fixture
-def mock_config(temp_dir):
-    """Create a mock configuration for testing"""
+@pytest.fixture(scope="session")
+def mock_config(tmp_path_factory):
+    """Create a mock configuration for testing (shared, so don't mutate it)"""
     config = Config(
-        anthropic_api_key="test_api_key",
-        chroma_db_path=f"{temp_dir}/test_chroma",
-        embedding_model="all-MiniLM-L6-v2",
-        claude_model="claude-sonnet-4-20250514",
-        chunk_size=800,
-        chunk_overlap=100,
-        max_search_results=5,
-        session_history_limit=2
+        ANTHROPIC_API_KEY="test_api_key",
+        ANTHROPIC_MODEL="claude-sonnet-4-20250514",
+        EMBEDDING_MODEL="all-MiniLM-L6-v2",
+        CHUNK_SIZE=800,
+        CHUNK_OVERLAP=100,
+        MAX_RESULTS=5,
+        MAX_HISTORY=2,
+        CHROMA_PATH=str(tmp_path_factory.mktemp("test_chroma")),
     )
     return config
 
@@ -84,7 +83,7 @@ def mock_anthropic_client():
     mock_client = Mock()
     mock_response = Mock()
     mock_response.content = [Mock(text="Test response from Claude")]
-    mock_client.messages.create.return_value = mock_response
+    mock_client.messages.create = AsyncMock(return_value=mock_response)
     return mock_client
 
 
@@ -112,7 +111,7 @@ def mock_rag_system(mock_config, mock_vector_store):
         mock_sm_class.return_value = Mock()
         
         rag_system = RAGSystem(mock_config)
-        rag_system.query = Mock(return_value=("Test answer", ["Test Course 1"]))
+        rag_system.query = AsyncMock(return_value=("Test answer", ["Test Course 1"]))
         rag_system.get_course_analytics = Mock(return_value={
             "total_courses": 2,
             "course_titles": ["Test Course 1", "Test Course 2"]
@@ -123,15 +122,34 @@ def mock_rag_system(mock_config, mock_vector_store):
 
 
 @pytest.fixture
+def app_rag():
+    """Mock RAG system injected into the test app"""
+    mock_rag = Mock()
+    mock_rag.query = AsyncMock(return_value=("Test response", ["Test Course 1"]))
+    mock_rag.get_course_analytics.return_value = {
+        "total_courses": 2,
+        "course_titles": ["Test Course 1", "Test Course 2"]
+    }
+    mock_rag.session_manager.create_session.return_value = "test_session_123"
+
+    async def query_stream(query, session_id):
+        yield {"type": "delta", "text": "Test "}
+        yield {"type": "delta", "text": "response"}
+        yield {"type": "done", "sources": ["Test Course 1"]}
+
+    mock_rag.query_stream = Mock(side_effect=query_stream)
+    return mock_rag
+
+
+@pytest.fixture(scope="session")
 def test_app():
-    """Create a test FastAPI app without static file mounting"""
-    from fastapi import FastAPI, HTTPException
+    """Create a test FastAPI app with the production API routes, without static file mounting"""
+    from fastapi import FastAPI
     from fastapi.middleware.cors import CORSMiddleware
-    from pydantic import BaseModel
-    from typing import List, Optional
-    
+    from fastapi.responses import ORJSONResponse
+
     # Create test app without problematic static file mounting
-    app = FastAPI(title="Test RAG System")
+    app = FastAPI(title="Test RAG System", default_response_class=ORJSONResponse)
     
     app.add_middleware(
         CORSMiddleware,
@@ -141,57 +159,9 @@ def test_app():
         allow_headers=["*"],
     )
     
-    # Pydantic models
-    class QueryRequest(BaseModel):
-        query: str
-        session_id: Optional[str] = None
-
-    class QueryResponse(BaseModel):
-        answer: str
-        sources: List[str]
-        session_id: str
-
-    class CourseStats(BaseModel):
-        total_courses: int
-        course_titles: List[str]
-    
-    # Mock RAG system for the app
-    mock_rag = Mock()
-    mock_rag.query.return_value = ("Test response", ["Test Course 1"])
-    mock_rag.get_course_analytics.return_value = {
-        "total_courses": 2,
-        "course_titles": ["Test Course 1", "Test Course 2"]
-    }
-    mock_rag.session_manager.create_session.return_value = "test_session_123"
-    
-    @app.post("/api/query", response_model=QueryResponse)
-    async def query_documents(request: QueryRequest):
-        try:
-            session_id = request.session_id
-            if not session_id:
-                session_id = mock_rag.session_manager.create_session()
-            
-            answer, sources = mock_rag.query(request.query, session_id)
-            
-            return QueryResponse(
-                answer=answer,
-                sources=sources,
-                session_id=session_id
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
-
-    @app.get("/api/courses", response_model=CourseStats)
-    async def get_course_stats():
-        try:
-            analytics = mock_rag.get_course_analytics()
-            return CourseStats(
-                total_courses=analytics["total_courses"],
-                course_titles=analytics["course_titles"]
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
-    
+    # Production API routes
+    app.include_router(router)
+
     @app.get("/")
     async def root():
         return {"message": "RAG System API"}
@@ -200,11 +170,28 @@ def test_app():
 
 
 @pytest.fixture
+def override_rag(test_app, app_rag):
+    """Inject a fresh mock RAG system into the shared test app for a test"""
+    test_app.dependency_overrides[get_rag_system] = lambda: app_rag
+    yield
+    test_app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="session")
 def client(test_app):
     """Create a test client for the FastAPI app"""
     return TestClient(test_app)
 
 
+@pytest_asyncio.fixture
+async def aclient(test_app, override_rag):
+    """Async client calling the test app in-process, without TestClient's portal thread"""
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=test_app), base_url="http://test"
+    ) as client:
+        yield client
+
+
 @pytest.fixture
 def sample_query_data():
     """Sample query request data"""
@@ -0,0 +1,262 @@
+import pytest
+from unittest.mock import MagicMock, patch, Mock
+
+from ai_generator import AIGenerator, TOKEN_EFFICIENT_TOOLS_BETA
+
+
+@pytest.fixture
+def generator(mock_anthropic_client):
+    """AIGenerator wired to the mocked Anthropic client"""
+    with patch(
+        "ai_generator.anthropic.AsyncAnthropic", return_value=mock_anthropic_client
+    ):
+        yield AIGenerator(api_key="test_api_key", model="claude-sonnet-4-20250514")
+
+
+@pytest.fixture
+def tool_definitions():
+    """Minimal tool definitions in Anthropic format"""
+    return [
+        {"name": "search_course_content", "input_schema": {"type": "object"}},
+        {"name": "get_course_outline", "input_schema": {"type": "object"}},
+    ]
+
+
+@pytest.mark.unit
+class TestPromptCaching:
+    """Test cases for Anthropic prompt caching breakpoints"""
+
+    async def test_system_prompt_is_cacheable_block(
+        self, generator, mock_anthropic_client
+    ):
+        """Test that the static system prompt is sent as a cached block"""
+        await generator.generate_response("What is MCP?")
+
+        system = mock_anthropic_client.messages.create.call_args.kwargs["system"]
+        assert system == [
+            {
+                "type": "text",
+                "text": AIGenerator.SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+        assert system is AIGenerator.SYSTEM_BLOCKS
+
+    async def test_history_is_sent_as_prior_messages(
+        self, generator, mock_anthropic_client
+    ):
+        """Test that history precedes the query and leaves the system prompt alone"""
+        history = [
+            {"role": "user", "content": "What is MCP?"},
+            {"role": "assistant", "content": "A protocol."},
+        ]
+
+        await generator.generate_response("And lesson 2?", conversation_history=history)
+
+        kwargs = mock_anthropic_client.messages.create.call_args.kwargs
+        assert len(kwargs["system"]) == 1
+        assert kwargs["messages"][0] == history[0]
+        assert kwargs["messages"][1]["content"] == [
+            {
+                "type": "text",
+                "text": "A protocol.",
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+        assert kwargs["messages"][2] == {"role": "user", "content": "And lesson 2?"}
+        assert history[1]["content"] == "A protocol."
+
+    async def test_last_tool_is_cache_breakpoint(
+        self, generator, mock_anthropic_client, tool_definitions
+    ):
+        """Test that only the last tool carries cache_control, without mutation"""
+        mock_anthropic_client.messages.create.return_value.stop_reason = "end_turn"
+
+        await generator.generate_response(
+            "What is MCP?", tools=tool_definitions, tool_manager=Mock()
+        )
+
+        tools = mock_anthropic_client.messages.create.call_args.kwargs["tools"]
+        assert "cache_control" not in tools[0]
+        assert tools[-1]["cache_control"] == {"type": "ephemeral"}
+        assert all("cache_control" not in tool for tool in tool_definitions)
+
+
+@pytest.mark.unit
+class TestToolRequestOptions:
+    """Test cases for request options sent with tool-enabled calls"""
+
+    async def test_token_efficient_tools_header(
+        self, mock_anthropic_client, tool_definitions
+    ):
+        """Test that the beta header is opt-in and sent only with tools"""
+        mock_anthropic_client.messages.create.return_value.stop_reason = "end_turn"
+        with patch(
+            "ai_generator.anthropic.AsyncAnthropic", return_value=mock_anthropic_client
+        ):
+            generator = AIGenerator(
+                "test_api_key", "claude-3-7-sonnet-latest", token_efficient_tools=True
+            )
+
+        await generator.generate_response(
+            "What is MCP?", tools=tool_definitions, tool_manager=Mock()
+        )
+        kwargs = mock_anthropic_client.messages.create.call_args.kwargs
+        assert kwargs["extra_headers"] == {"anthropic-beta": TOKEN_EFFICIENT_TOOLS_BETA}
+
+        await generator.generate_response("What is MCP?")
+        kwargs = mock_anthropic_client.messages.create.call_args.kwargs
+        assert "extra_headers" not in kwargs
+
+    async def test_prepared_tools_reused_until_tools_change(
+        self, generator, mock_anthropic_client, tool_definitions
+    ):
+        """Test that the cache-marked tool list is built once per tool list"""
+        mock_anthropic_client.messages.create.return_value.stop_reason = "end_turn"
+        create = mock_anthropic_client.messages.create
+
+        await generator.generate_response(
+            "Q1", tools=tool_definitions, tool_manager=Mock()
+        )
+        first = create.call_args.kwargs["tools"]
+        await generator.generate_response(
+            "Q2", tools=tool_definitions, tool_manager=Mock()
+        )
+        assert create.call_args.kwargs["tools"] is first
+
+        await generator.generate_response(
+            "Q3", tools=tool_definitions[:1], tool_manager=Mock()
+        )
+        assert create.call_args.kwargs["tools"] is not first
+
+
+def _tool_use_block(block_id, name, **tool_input):
+    """Build a mock tool_use content block"""
+    block = Mock(type="tool_use", id=block_id, input=tool_input)
+    block.name = name
+    return block
+
+
+@pytest.mark.unit
+class TestToolExecution:
+    """Test cases for executing the tool calls in a Claude response"""
+
+    async def test_parallel_tool_calls_keep_block_order(self, generator):
+        """Test that results follow block order and failures are reported"""
+        tool_manager = Mock()
+        tool_manager.execute_tool.side_effect = lambda name, **kwargs: (
+            "outline" if name == "get_course_outline" else 1 / 0
+        )
+        response = Mock(
+            content=[
+                _tool_use_block("tool_1", "search_course_content", query="MCP"),
+                _tool_use_block("tool_2", "get_course_outline", course_title="MCP"),
+            ]
+        )
+
+        messages, success = await generator._handle_tool_execution(
+            response, [], tool_manager
+        )
+
+        assert success is False
+        results = messages[-1]["content"]
+        assert [r["tool_use_id"] for r in results] == ["tool_1", "tool_2"]
+        assert results[0]["content"].startswith("Tool execution failed")
+        assert results[1]["content"] == "outline"
+
+    async def test_single_round_makes_one_final_call(
+        self, generator, mock_anthropic_client, tool_definitions
+    ):
+        """Test that max_rounds=1 answers in one call after the tool round"""
+        tool_response = Mock(
+            stop_reason="tool_use",
+            content=[_tool_use_block("tool_1", "search_course_content", query="MCP")],
+        )
+        final_response = Mock(stop_reason="end_turn", content=[Mock(text="Answer")])
+        create = mock_anthropic_client.messages.create
+        create.side_effect = [tool_response, final_response]
+        tool_manager = Mock()
+        tool_manager.execute_tool.return_value = "results"
+
+        result = await generator.generate_response(
+            "What is MCP?",
+            tools=tool_definitions,
+            tool_manager=tool_manager,
+            max_rounds=1,
+        )
+
+        assert result == "Answer"
+        assert create.call_count == 2
+        final_kwargs = create.call_args.kwargs
+        assert final_kwargs["tool_choice"] == {"type": "none"}
+        assert final_kwargs["tools"] == create.call_args_list[0].kwargs["tools"]
+
+    async def test_max_rounds_must_be_positive(self, generator, tool_definitions):
+        """Test that max_rounds below 1 is rejected before any API call"""
+        with pytest.raises(ValueError):
+            await generator.generate_response(
+                "What is MCP?",
+                tools=tool_definitions,
+                tool_manager=Mock(),
+                max_rounds=0,
+            )
+
+
+@pytest.mark.unit
+class TestResponseStreaming:
+    """Test cases for streaming the final response"""
+
+    async def test_final_answer_streams_after_tool_round(
+        self, generator, mock_anthropic_client, tool_definitions
+    ):
+        """Test that tool rounds complete before the final answer is streamed"""
+        tool_response = Mock(
+            stop_reason="tool_use",
+            content=[_tool_use_block("tool_1", "search_course_content", query="MCP")],
+        )
+        mock_anthropic_client.messages.create.return_value = tool_response
+
+        async def text_stream():
+            for text in ("MCP is ", "a protocol."):
+                yield text
+
+        stream = MagicMock()
+        stream.__aenter__.return_value.text_stream = text_stream()
+        mock_anthropic_client.messages.stream = Mock(return_value=stream)
+        tool_manager = Mock()
+        tool_manager.execute_tool.return_value = "results"
+
+        chunks = [
+            chunk
+            async for chunk in generator.generate_response_stream(
+                "What is MCP?",
+                tools=tool_definitions,
+                tool_manager=tool_manager,
+                max_rounds=1,
+            )
+        ]
+
+        assert chunks == ["MCP is ", "a protocol."]
+        messages = mock_anthropic_client.messages.stream.call_args.kwargs["messages"]
+        assert messages[-1]["content"][0]["content"] == "results"
+        stream_kwargs = mock_anthropic_client.messages.stream.call_args.kwargs
+        assert stream_kwargs["tool_choice"] == {"type": "none"}
+
+    async def test_stream_failure_raises_after_partial_answer(
+        self, generator, mock_anthropic_client
+    ):
+        """Test that an API failure mid-stream raises instead of yielding error text"""
+        async def text_stream():
+            yield "MCP is "
+            raise ConnectionError("connection reset")
+
+        stream = MagicMock()
+        stream.__aenter__.return_value.text_stream = text_stream()
+        mock_anthropic_client.messages.stream = Mock(return_value=stream)
+
+        chunks = []
+        with pytest.raises(RuntimeError, match="connection reset"):
+            async for chunk in generator.generate_response_stream("What is MCP?"):
+                chunks.append(chunk)
+
+        assert chunks == ["MCP is "]
@@ -1,7 +1,12 @@
+import asyncio
+import json
 import pytest
 from fastapi import status
 from unittest.mock import patch, Mock
 
+# The shared client is session-scoped, so each test installs the mock RAG system
+pytestmark = pytest.mark.usefixtures("override_rag")
+
 
 @pytest.mark.api
 class TestQueryEndpoint:
@@ -76,6 +81,15 @@ class TestQueryEndpoint:
         
         assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
         
+    def test_query_rag_error_returns_500(self, client, app_rag, sample_query_data):
+        """Test query endpoint when the RAG system raises an exception"""
+        app_rag.query.side_effect = RuntimeError("vector store unavailable")
+
+        response = client.post("/api/query", json=sample_query_data["valid_query"])
+
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert response.json()["detail"] == "vector store unavailable"
+
     def test_query_response_structure(self, client, sample_query_data):
         """Test that query response has correct structure"""
         response = client.post("/api/query", json=sample_query_data["valid_query"])
@@ -97,6 +111,57 @@ class TestQueryEndpoint:
         for source in data["sources"]:
             assert isinstance(source, str)
 
+    def test_query_streams_server_sent_events(self, client, sample_query_data):
+        """Test that the query endpoint streams events when asked to"""
+        response = client.post(
+            "/api/query",
+            json=sample_query_data["valid_query"],
+            headers={"accept": "text/event-stream"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = [
+            json.loads(line.removeprefix("data: "))
+            for line in response.text.split("\n\n")
+            if line
+        ]
+        deltas = [e["text"] for e in events if e["type"] == "delta"]
+        assert "".join(deltas) == "Test response"
+        assert events[-1] == {
+            "type": "done",
+            "sources": ["Test Course 1"],
+            "session_id": "test_session_123",
+        }
+
+    def test_query_stream_failure_sends_error_event(
+        self, client, app_rag, sample_query_data
+    ):
+        """Test that a failure after streaming starts ends with an error event"""
+        async def query_stream(query, session_id):
+            yield {"type": "delta", "text": "Partial"}
+            raise ValueError("embedding failed")
+
+        app_rag.query_stream.side_effect = query_stream
+
+        response = client.post(
+            "/api/query",
+            json=sample_query_data["valid_query"],
+            headers={"accept": "text/event-stream"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        events = [
+            json.loads(line.removeprefix("data: "))
+            for line in response.text.split("\n\n")
+            if line
+        ]
+        assert events == [
+            {"type": "delta", "text": "Partial"},
+            {"type": "error", "detail": "embedding failed"},
+        ]
+
 
 @pytest.mark.api
 class TestCoursesEndpoint:
@@ -144,13 +209,39 @@ class TestCoursesEndpoint:
         data = response.json()
         
         assert data["total_courses"] == len(data["course_titles"])
-        
+
+    def test_courses_use_app_state_rag_system(self, client, test_app, app_rag):
+        """Test that without an override endpoints use the app's RAG system"""
+        test_app.dependency_overrides.clear()
+        test_app.state.rag_system = app_rag
+        try:
+            response = client.get("/api/courses")
+        finally:
+            del test_app.state.rag_system
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["total_courses"] == 2
+
     def test_courses_post_method_not_allowed(self, client):
         """Test that POST method is not allowed on courses endpoint"""
         response = client.post("/api/courses")
         
         assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
 
+    def test_response_models_documented(self, client):
+        """Test that the production endpoints still document their response models"""
+        paths = client.get("/openapi.json").json()["paths"]
+
+        for path, method, model in [
+            ("/api/query", "post", "QueryResponse"),
+            ("/api/courses", "get", "CourseStats"),
+            ("/api/clear_session", "post", "ClearSessionResponse"),
+        ]:
+            schema = paths[path][method]["responses"]["200"]["content"][
+                "application/json"
+            ]["schema"]
+            assert schema["$ref"].endswith(f"/{model}")
+
 
 @pytest.mark.api
 class TestRootEndpoint:
@@ -279,19 +370,16 @@ class TestEndpointIntegration:
         data2 = response2.json()
         assert data2["session_id"] == session_id
         
-    def test_concurrent_requests(self, client, sample_query_data):
+    async def test_concurrent_requests(self, aclient, app_rag, sample_query_data):
         """Test handling of concurrent requests"""
-        import concurrent.futures
-        import threading
-        
-        def make_request():
-            return client.post("/api/query", json=sample_query_data["query_without_session"])
+        payload = sample_query_data["query_without_session"]
         
-        # Make multiple concurrent requests
-        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-            futures = [executor.submit(make_request) for _ in range(3)]
-            responses = [future.result() for future in futures]
+        # Make multiple concurrent requests on the event loop
+        responses = await asyncio.gather(
+            *(aclient.post("/api/query", json=payload) for _ in range(3))
+        )
         
+        assert app_rag.query.await_count == 3
         # All requests should succeed
         for response in responses:
             assert response.status_code == status.HTTP_200_OK
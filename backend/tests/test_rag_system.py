@@ -0,0 +1,149 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from rag_system import RAGSystem
+from search_tools import Tool, record_sources
+
+
+class FakeSearchTool(Tool):
+    """Search tool that records one source named after the query"""
+
+    def get_tool_definition(self):
+        return {"name": "search_course_content", "input_schema": {"type": "object"}}
+
+    def execute(self, query):
+        record_sources([{"text": f"src-for-{query}", "url": None}])
+        return f"results for {query}"
+
+
+@pytest.fixture
+def rag_system(mock_config):
+    """RAGSystem with mocked vector store, AI generator and sessions"""
+    with patch("rag_system.VectorStore") as mock_vs_class, \
+         patch("rag_system.AIGenerator") as mock_ai_class, \
+         patch("rag_system.SessionManager"):
+        mock_vs_class.return_value.embedding_function = None
+        mock_ai_class.return_value.is_error_response = Mock(return_value=False)
+        yield RAGSystem(mock_config)
+
+
+@pytest.mark.unit
+class TestQueryCoalescing:
+    """Test cases for sharing one generation between identical queries"""
+
+    async def test_identical_concurrent_queries_share_one_generation(
+        self, rag_system
+    ):
+        """Test that concurrent identical queries make a single Claude call"""
+        release = asyncio.Event()
+
+        async def generate_response(**kwargs):
+            await release.wait()
+            return "MCP is a protocol."
+
+        generate = AsyncMock(side_effect=generate_response)
+        rag_system.ai_generator.generate_response = generate
+
+        pending = [
+            asyncio.ensure_future(rag_system.query("What is MCP?")) for _ in range(3)
+        ]
+        other = asyncio.ensure_future(rag_system.query("What is RAG?"))
+        # Hold the generation until every query has missed the cache
+        while generate.await_count < 2:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        release.set()
+        results = await asyncio.gather(*pending, other)
+
+        assert generate.await_count == 2
+        assert [response for response, _ in results[:3]] == ["MCP is a protocol."] * 3
+        assert rag_system._in_flight == {}
+
+    async def test_query_joins_identical_streamed_generation(self, rag_system):
+        """Test that a query waits on an identical stream instead of generating"""
+        release = asyncio.Event()
+
+        async def generate_response_stream(**kwargs):
+            yield "MCP is "
+            await release.wait()
+            yield "a protocol."
+
+        rag_system.ai_generator.generate_response_stream = generate_response_stream
+        rag_system.ai_generator.generate_response = AsyncMock()
+
+        stream = rag_system.query_stream("What is MCP?")
+        first = await anext(stream)
+        joined = asyncio.ensure_future(rag_system.query("What is MCP?"))
+        await asyncio.sleep(0.05)
+        release.set()
+        events = [first] + [event async for event in stream]
+
+        assert events == [
+            {"type": "delta", "text": "MCP is "},
+            {"type": "delta", "text": "a protocol."},
+            {"type": "done", "sources": []},
+        ]
+        assert await joined == ("MCP is a protocol.", [])
+        # The streamed answer was cached for later queries too
+        assert await rag_system.query("What is MCP?") == ("MCP is a protocol.", [])
+        rag_system.ai_generator.generate_response.assert_not_awaited()
+
+
+@pytest.mark.unit
+class TestQueryStreamFailure:
+    """Test cases for streamed generations that fail part way"""
+
+    async def test_failed_stream_raises_and_is_not_remembered(self, rag_system):
+        """Test that a failed stream is neither cached nor added to history"""
+        async def generate_response_stream(**kwargs):
+            yield "MCP is "
+            raise RuntimeError("Error generating response: overloaded")
+
+        rag_system.ai_generator.generate_response_stream = generate_response_stream
+        rag_system.session_manager.get_history_messages.return_value = None
+
+        events = []
+        with pytest.raises(RuntimeError, match="overloaded"):
+            async for event in rag_system.query_stream("What is MCP?", "session_1"):
+                events.append(event)
+
+        assert events == [{"type": "delta", "text": "MCP is "}]
+        rag_system.session_manager.add_exchange.assert_not_called()
+        assert rag_system.response_cache.get(
+            rag_system._prepare_query("What is MCP?", "session_1").cache_key
+        ) is None
+
+
+@pytest.mark.unit
+class TestQuerySources:
+    """Test cases for attributing search sources to the query that found them"""
+
+    async def test_interleaved_queries_keep_their_own_sources(self, rag_system):
+        """Test that overlapping queries each return only their own sources"""
+        rag_system.tool_manager.register_tool(FakeSearchTool())
+        searched = {"A": asyncio.Event(), "B": asyncio.Event()}
+
+        async def generate_response(query, tools, tool_manager, **kwargs):
+            # A searches, then B searches, then A answers
+            topic = query[-1]
+            if topic == "B":
+                await searched["A"].wait()
+            await asyncio.to_thread(
+                tool_manager.execute_tool, "search_course_content", query=topic
+            )
+            searched[topic].set()
+            if topic == "A":
+                await searched["B"].wait()
+            return f"answer {topic}"
+
+        rag_system.ai_generator.generate_response = AsyncMock(
+            side_effect=generate_response
+        )
+
+        results = await asyncio.gather(rag_system.query("A"), rag_system.query("B"))
+
+        assert results == [
+            ("answer A", [{"text": "src-for-A", "url": None}]),
+            ("answer B", [{"text": "src-for-B", "url": None}]),
+        ]
@@ -0,0 +1,94 @@
+import pytest
+from unittest.mock import patch
+
+from response_cache import ResponseCache
+
+
+def _fake_embedding_function(texts):
+    """Embed by keyword so related phrasings land close together"""
+    return [[1.0, 0.0] if "mcp" in text.lower() else [0.0, 1.0] for text in texts]
+
+
+@pytest.fixture
+def cache():
+    """Response cache with a deterministic embedding function"""
+    return ResponseCache(
+        maxsize=2, ttl=60.0, embedding_function=_fake_embedding_function
+    )
+
+
+@pytest.fixture
+def context():
+    """Cache context for a fixed tool set and no history"""
+    return ResponseCache.make_context(b"tools-v1", None)
+
+
+@pytest.mark.unit
+class TestResponseCache:
+    """Test cases for the exact and semantic response cache"""
+
+    def test_exact_hit(self, cache, context):
+        """Test that the same query in the same context is a hit"""
+        key = ResponseCache.make_key("What is MCP?", context)
+        cache.put(key, ("answer", []), context)
+
+        assert cache.get(key) == ("answer", [])
+
+    def test_context_change_is_a_miss(self, cache, context):
+        """Test that tools or history changes produce a different key"""
+        history = [{"role": "user", "content": "hi"}]
+        other_context = ResponseCache.make_context(b"tools-v1", history)
+
+        assert other_context != context
+        assert ResponseCache.make_key("Q", context) != ResponseCache.make_key(
+            "Q", other_context
+        )
+
+    def test_expired_entry_is_a_miss(self, cache, context):
+        """Test that entries are dropped once their TTL has passed"""
+        key = ResponseCache.make_key("What is MCP?", context)
+        with patch("response_cache.time.monotonic", return_value=0.0):
+            cache.put(key, ("answer", []), context)
+        with patch("response_cache.time.monotonic", return_value=61.0):
+            assert cache.get(key) is None
+
+    def test_least_recently_used_is_evicted(self, cache, context):
+        """Test that the LRU entry is evicted when the cache is full"""
+        keys = [ResponseCache.make_key(q, context) for q in ("Q1", "Q2", "Q3")]
+        cache.put(keys[0], "A1", context)
+        cache.put(keys[1], "A2", context)
+        cache.get(keys[0])
+        cache.put(keys[2], "A3", context)
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == "A1"
+
+    def test_semantic_hit_requires_same_context(self, cache, context):
+        """Test that near-identical queries hit only within the same context"""
+        key = ResponseCache.make_key("What is MCP?", context)
+        cache.put(key, "answer", context, cache.embed("What is MCP?"))
+
+        embedding = cache.embed("what's mcp")
+        assert cache.get_similar(embedding, context) == "answer"
+        assert cache.get_similar(cache.embed("Explain RAG"), context) is None
+        other_context = ResponseCache.make_context(b"tools-v2", None)
+        assert cache.get_similar(embedding, other_context) is None
+
+    def test_semantic_lookup_disabled_without_embeddings(self, context):
+        """Test that only exact matching is used with no embedding function"""
+        cache = ResponseCache()
+
+        assert cache.embed("What is MCP?") is None
+        assert cache.get_similar(None, context) is None
+
+    def test_expired_best_match_does_not_hide_live_match(self, cache, context):
+        """Test that semantic lookups only consider entries still in the cache"""
+        stale = ResponseCache.make_key("What is MCP?", context)
+        live = ResponseCache.make_key("MCP overview", context)
+        with patch("response_cache.time.monotonic", return_value=0.0):
+            cache.put(stale, "stale answer", context, cache.embed("What is MCP?"))
+        with patch("response_cache.time.monotonic", return_value=30.0):
+            cache.put(live, "live answer", context, cache.embed("MCP overview"))
+
+        with patch("response_cache.time.monotonic", return_value=61.0):
+            assert cache.get_similar(cache.embed("what's mcp"), context) == "live answer"
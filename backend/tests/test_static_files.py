@@ -1,149 +1,190 @@
+import asyncio
+import hashlib
+import httpx
 import pytest
-from unittest.mock import patch, Mock
-from fastapi import status
+import pytest_asyncio
+from fastapi import FastAPI, Request, status
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response
+from fastapi.staticfiles import StaticFiles
 from fastapi.testclient import TestClient
-from pathlib import Path
+from pydantic import BaseModel
+from typing import List, Optional
+
+from static_files import DevStaticFiles
+
+
+# Exact body of the test app's JSON root endpoint
+_ROOT_JSON = b'{"message":"RAG System API"}'
+
+# Frontend index page written to disk for the StaticFiles tests
+_INDEX_HTML = b"<!DOCTYPE html><html><head><title>Test App</title></head><body><h1>Test RAG System</h1></body></html>"
+
+# Root page served from memory by the app without static file mounting
+_HTML_ROOT = b"""<!DOCTYPE html>
+<html>
+<head><title>RAG System</title></head>
+<body>
+    <h1>Course Materials RAG System</h1>
+    <p>API is running</p>
+</body>
+</html>
+"""
+_HTML_ROOT_ETAG = f'"{hashlib.md5(_HTML_ROOT).hexdigest()}"'
+
+# Other frontend files by the content type StaticFiles should serve them with.
+# Types come from the host's mimetypes tables, and older ones map .js to
+# application/javascript, so either JavaScript type is accepted
+_FRONTEND_FILES = {
+    "script.js": (
+        ("text/javascript", "application/javascript"),
+        b"console.log('ok');",
+    ),
+    "style.css": ("text/css", b"body { margin: 0; }"),
+    "data.json": ("application/json", b"{}"),
+}
+
+
+@pytest.fixture(scope="session")
+def frontend_dir(tmp_path_factory):
+    """Temporary frontend directory with index.html and assets, written once"""
+    frontend_dir = tmp_path_factory.mktemp("frontend")
+    (frontend_dir / "index.html").write_bytes(_INDEX_HTML)
+    for filename, (_, content) in _FRONTEND_FILES.items():
+        (frontend_dir / filename).write_bytes(content)
+    return frontend_dir
+
+
+@pytest.fixture(scope="module")
+def static_app(frontend_dir):
+    """App serving the temporary frontend with StaticFiles"""
+    # Create test app with static files
+    app = FastAPI()
+    app.mount("/", StaticFiles(directory=str(frontend_dir), html=True), name="static")
+    return app
+
+
+@pytest.fixture(scope="module")
+def static_client(static_app):
+    """Client for the StaticFiles app"""
+    with TestClient(static_app) as test_client:
+        yield test_client
+
+
+@pytest_asyncio.fixture
+async def static_aclient(static_app):
+    """Async client calling the StaticFiles app in-process"""
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=static_app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def dev_static_client(frontend_dir):
+    """Client for an app serving the temporary frontend with DevStaticFiles"""
+    app = FastAPI()
+    app.mount("/", DevStaticFiles(directory=str(frontend_dir), html=True), name="static")
+    
+    with TestClient(app) as test_client:
+        yield test_client
 
 
 @pytest.mark.api
 class TestStaticFileHandling:
     """Test cases for static file serving functionality"""
     
-    def test_root_endpoint_serves_content(self, client):
-        """Test that root endpoint serves some content"""
-        response = client.get("/")
-        
-        assert response.status_code == status.HTTP_200_OK
-        data = response.json()
-        assert "message" in data
-        
-    def test_static_file_headers(self, client):
-        """Test that static file responses have appropriate headers"""
-        response = client.get("/")
+    async def test_root_response(self, aclient):
+        """Test that the root endpoint serves JSON content with matching headers"""
+        response = await aclient.get("/")
         
         assert response.status_code == status.HTTP_200_OK
-        
-        # Test basic response structure
         assert response.headers.get("content-type") == "application/json"
+        assert response.content == _ROOT_JSON
         
     @pytest.mark.integration
-    def test_static_file_integration_with_real_app(self):
+    @pytest.mark.parametrize("path, code, body", [
+        ("/", status.HTTP_200_OK, _INDEX_HTML),
+        ("/index.html", status.HTTP_200_OK, _INDEX_HTML),
+        ("/nonexistent.html", status.HTTP_404_NOT_FOUND, None),
+    ])
+    def test_static_file_integration_with_real_app(self, static_client, path, code, body):
         """Integration test with real app static file mounting"""
         # This test demonstrates how to handle static file mounting in real scenarios
-        from fastapi import FastAPI
-        from fastapi.staticfiles import StaticFiles
-        from fastapi.testclient import TestClient
-        import tempfile
-        import os
-        
-        # Create a temporary frontend directory
-        with tempfile.TemporaryDirectory() as temp_dir:
-            frontend_dir = Path(temp_dir) / "frontend"
-            frontend_dir.mkdir()
-            
-            # Create a simple index.html
-            (frontend_dir / "index.html").write_text("""
-            <!DOCTYPE html>
-            <html>
-            <head><title>Test App</title></head>
-            <body><h1>Test RAG System</h1></body>
-            </html>
-            """)
-            
-            # Create test app with static files
-            app = FastAPI()
-            app.mount("/", StaticFiles(directory=str(frontend_dir), html=True), name="static")
-            
-            # Test the static file serving
-            with TestClient(app) as test_client:
-                response = test_client.get("/")
-                assert response.status_code == status.HTTP_200_OK
-                assert "Test RAG System" in response.text
-                
-                # Test non-existent file
-                response = test_client.get("/nonexistent.html")
-                assert response.status_code == status.HTTP_404_NOT_FOUND
+        response = static_client.get(path)
+        assert response.status_code == code
+        if body is not None:
+            assert response.content == body
+    
+    async def test_static_file_mime_types(self, static_aclient):
+        """Test the content types frontend files are served with"""
+        responses = await asyncio.gather(
+            *(static_aclient.get(f"/{filename}") for filename in _FRONTEND_FILES)
+        )
+        
+        for (expected_mimes, content), response in zip(
+            _FRONTEND_FILES.values(), responses
+        ):
+            assert response.status_code == status.HTTP_200_OK
+            assert response.headers["content-type"].startswith(expected_mimes)
+            assert response.content == content
 
 
 @pytest.mark.unit
 class TestDevStaticFiles:
     """Test cases for the custom DevStaticFiles class"""
     
-    @patch('fastapi.staticfiles.StaticFiles')
-    def test_dev_static_files_headers(self, mock_static_files):
+    def test_dev_static_files_headers(self, dev_static_client):
         """Test that DevStaticFiles adds no-cache headers"""
-        # This is a conceptual test since we can't easily test the actual DevStaticFiles
-        # In a real scenario, you would test the custom headers
-        
-        # Mock setup
-        mock_response = Mock()
-        mock_response.headers = {}
-        mock_static_files.return_value.get_response.return_value = mock_response
-        
-        # Expected headers for development
-        expected_headers = {
-            "Cache-Control": "no-cache, no-store, must-revalidate",
-            "Pragma": "no-cache",
-            "Expires": "0"
-        }
+        response = dev_static_client.get("/")
         
-        # In actual implementation, DevStaticFiles would add these headers
-        for key, value in expected_headers.items():
-            assert key in expected_headers
-            assert expected_headers[key] == value
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["cache-control"] == "no-cache, no-store, must-revalidate"
+        assert response.headers["pragma"] == "no-cache"
+        assert response.headers["expires"] == "0"
+        
+    def test_dev_static_files_conditional_get(self, dev_static_client):
+        """Test that no-cache still allows revalidation with If-Modified-Since"""
+        head = dev_static_client.head("/")
+        assert head.status_code == status.HTTP_200_OK
+        assert head.content == b""
+        
+        response = dev_static_client.get(
+            "/", headers={"If-Modified-Since": head.headers["last-modified"]}
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+
+
+class QueryRequest(BaseModel):
+    query: str
+    session_id: Optional[str] = None
+
+
+class QueryResponse(BaseModel):
+    answer: str
+    sources: List[str]
+    session_id: str
 
 
 @pytest.mark.integration  
 class TestFullAppStaticFileHandling:
     """Integration tests for static file handling in the full application context"""
     
-    def test_app_without_static_mounting_issues(self):
-        """Test creating an app that avoids static file mounting issues"""
-        from fastapi import FastAPI
-        from fastapi.responses import HTMLResponse
-        from fastapi.testclient import TestClient
-        
+    @pytest.fixture(scope="class")
+    @staticmethod
+    def combined_client():
+        """Client for an app serving an HTML root route and API endpoints"""
         # Create a test app that serves HTML content without static file mounting
         app = FastAPI()
+        app.add_middleware(GZipMiddleware, minimum_size=0)
         
-        @app.get("/", response_class=HTMLResponse)
-        async def read_root():
-            return """
-            <!DOCTYPE html>
-            <html>
-            <head><title>RAG System</title></head>
-            <body>
-                <h1>Course Materials RAG System</h1>
-                <p>API is running</p>
-            </body>
-            </html>
-            """
-        
-        # Test the alternative approach
-        with TestClient(app) as client:
-            response = client.get("/")
-            assert response.status_code == status.HTTP_200_OK
-            assert "RAG System" in response.text
-            assert response.headers["content-type"].startswith("text/html")
-            
-    def test_api_endpoints_work_without_static_files(self):
-        """Test that API endpoints work independently of static file serving"""
-        from fastapi import FastAPI, HTTPException
-        from fastapi.testclient import TestClient
-        from pydantic import BaseModel
-        from typing import List, Optional
-        
-        # Create minimal app with just API endpoints
-        app = FastAPI()
-        
-        class QueryRequest(BaseModel):
-            query: str
-            session_id: Optional[str] = None
-            
-        class QueryResponse(BaseModel):
-            answer: str
-            sources: List[str]
-            session_id: str
+        @app.get("/", response_class=Response)
+        async def read_root(request: Request):
+            headers = {"ETag": _HTML_ROOT_ETAG}
+            if request.headers.get("if-none-match") == _HTML_ROOT_ETAG:
+                return Response(status_code=304, headers=headers)
+            return Response(content=_HTML_ROOT, media_type="text/html", headers=headers)
         
         @app.post("/api/query", response_model=QueryResponse)
         async def query_documents(request: QueryRequest):
@@ -153,59 +194,33 @@ class TestFullAppStaticFileHandling:
                 session_id=request.session_id or "new_session"
             )
         
-        # Test API functionality without static files
         with TestClient(app) as client:
-            response = client.post("/api/query", json={
-                "query": "test query"
-            })
-            assert response.status_code == status.HTTP_200_OK
-            data = response.json()
-            assert data["answer"] == "Test response"
-            assert len(data["sources"]) == 1
-
-
-@pytest.mark.unit
-class TestStaticFileConfiguration:
-    """Test static file configuration and setup"""
+            yield client
     
-    def test_frontend_directory_requirements(self):
-        """Test requirements for frontend directory structure"""
-        # This test documents the expected frontend structure
-        expected_files = [
-            "index.html",
-            "script.js", 
-            "style.css"
-        ]
-        
-        # In a real test environment, you might check these files exist
-        for filename in expected_files:
-            assert isinstance(filename, str)
-            assert len(filename) > 0
-            assert "." in filename  # Has extension
-            
-    def test_static_file_mime_types(self):
-        """Test expected MIME types for different file extensions"""
-        mime_types = {
-            ".html": "text/html",
-            ".js": "application/javascript", 
-            ".css": "text/css",
-            ".json": "application/json"
-        }
-        
-        for extension, expected_mime in mime_types.items():
-            assert extension.startswith(".")
-            assert "/" in expected_mime
-            # In real implementation, you would test FastAPI's static file MIME handling
+    def test_app_without_static_mounting_issues(self, combined_client):
+        """Test creating an app that avoids static file mounting issues"""
+        response = combined_client.get("/", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == status.HTTP_200_OK
+        assert b"RAG System" in response.content
+        assert response.headers["content-type"].startswith("text/html")
+        assert response.headers.get("content-encoding") == "gzip"
+        
+    def test_html_root_conditional_get(self, combined_client):
+        """Test that a matching If-None-Match gets an empty 304"""
+        etag = combined_client.get("/").headers["etag"]
+        assert etag == _HTML_ROOT_ETAG
+        
+        response = combined_client.get("/", headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert response.headers["etag"] == etag
             
-    def test_cache_control_configuration(self):
-        """Test cache control settings for development"""
-        # Test the configuration values used in DevStaticFiles
-        cache_settings = {
-            "no_cache": "no-cache, no-store, must-revalidate",
-            "pragma": "no-cache",
-            "expires": "0"
-        }
-        
-        for setting_name, setting_value in cache_settings.items():
-            assert isinstance(setting_value, str)
-            assert len(setting_value) > 0
\ No newline at end of file
+    def test_api_endpoints_work_without_static_files(self, combined_client):
+        """Test that API endpoints work independently of static file serving"""
+        response = combined_client.post("/api/query", json={
+            "query": "test query"
+        })
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["answer"] == "Test response"
+        assert len(data["sources"]) == 1
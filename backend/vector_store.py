@@ -2,6 +2,7 @@ import chromadb
 from chromadb.config import Settings
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
+from functools import lru_cache
 from models import Course, CourseChunk
 from sentence_transformers import SentenceTransformer
 
@@ -40,6 +41,14 @@ class SearchResults:
         return len(self.documents) == 0
 
 
+@lru_cache(maxsize=None)
+def get_embedding_function(model_name: str):
+    """Get a sentence transformer embedding function, loading each model once"""
+    return chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction(
+        model_name=model_name
+    )
+
+
 class VectorStore:
     """Vector storage using ChromaDB for course content and metadata"""
 
@@ -51,11 +60,7 @@ class VectorStore:
         )
 
         # Set up sentence transformer embedding function
-        self.embedding_function = (
-            chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction(
-                model_name=embedding_model
-            )
-        )
+        self.embedding_function = get_embedding_function(embedding_model)
 
         # Create collections for different types of data
         self.course_catalog = self._create_collection(